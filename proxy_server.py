@@ -1,75 +1,219 @@
+import abc
+import argparse
 import asyncio
+import atexit
+import errno
+import signal
 import socket
+import struct
 import psutil
 import logging
+import logging.handlers
+import queue
 from collections import deque
-from typing import List, Dict, Deque
+from typing import (
+    Any, Callable, Coroutine, List, Dict, Deque, Tuple, Iterator, NamedTuple,
+    Optional, Set, TypeVar
+)
+import itertools
+import array
 import time
 from urllib.parse import urlparse
 import datetime
 import os
+import sys
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(message)s'
-)
+try:
+    import uvloop  # Optional, faster event loop on Linux/macOS
+except ImportError:
+    uvloop = None
+
+T = TypeVar('T')
+
+# ProxyServer routes logging through this queue; the event loop only enqueues
+# records, and a listener thread does the console and file writes
+_log_queue: 'queue.SimpleQueue[logging.LogRecord]' = queue.SimpleQueue()
+_log_formatter = logging.Formatter('%(asctime)s | %(levelname)s | %(message)s')
 logger = logging.getLogger(__name__)
 
+# Forwarding buffers are recycled between connections instead of allocating per chunk.
+# The pool is bounded so a burst of connections does not pin its buffers forever.
+BUFFER_SIZE = 65536
+BUFFER_POOL_SIZE = 1024
+_buffers: Deque[bytearray] = deque(maxlen=BUFFER_POOL_SIZE)
+
+# Canned responses written back to the client
+_RESP_200 = b'HTTP/1.1 200 Connection established\r\n\r\n'
+_RESP_502 = b'HTTP/1.1 502 Bad Gateway\r\n\r\n'
+_RESP_503 = b'HTTP/1.1 503 Service Unavailable\r\n\r\n'
+
+# Linux can move socket data through a pipe without copying it into userspace
+_HAS_SPLICE = hasattr(os, 'splice')
+_SPLICE_FLAGS = getattr(os, 'SPLICE_F_MOVE', 0) | getattr(os, 'SPLICE_F_NONBLOCK', 0)
+
+# accept() failures that mean the process or system is out of descriptors
+_FD_EXHAUSTED = (errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM)
+ACCEPT_RETRY_DELAY = 0.1
+_MACOS_OPEN_MAX = 10240  # OPEN_MAX from <sys/syslimits.h>
+
+# (unit, divisor) pairs indexed by the power of 1024 a byte count falls into
+_UNITS = (('B', 1), ('KB', 1 << 10), ('MB', 1 << 20), ('GB', 1 << 30), ('TB', 1 << 40))
+
+class ParsedRequest(NamedTuple):
+    """Target of a proxied request, parsed once from the request head"""
+    method: str
+    host: str
+    port: int
+    raw: bytes
+
+def _parse_request(data: bytes) -> ParsedRequest:
+    """Parse the request line and Host header, scanning the raw bytes without decoding the payload"""
+    line_end = data.find(b'\n')
+    if line_end < 0:
+        line_end = len(data)
+    first_line = data[:line_end].strip()
+    try:
+        method, url, protocol = first_line.decode('ascii', errors='ignore').split(' ')
+    except ValueError:
+        raise ValueError(f"Invalid request format: {first_line!r}") from None
+
+    # Fast path for CONNECT
+    if method == 'CONNECT':
+        host, port_text = url.split(':')
+        return ParsedRequest(method, host, int(port_text), data)
+
+    # Quick host extraction, limited to the header block
+    # Start at the request line's \r so a request without headers ends its head right there
+    head_end = data.find(b'\r\n\r\n', max(line_end - 1, 0))
+    if head_end < 0:
+        head_end = len(data)
+    # Header names are case-insensitive; lower() keeps offsets, so search a lowered copy of the head
+    host_start = data[:head_end].lower().find(b'\nhost:', line_end)
+    if host_start >= 0:
+        host_start += 6
+        host_end = data.find(b'\r\n', host_start)
+        if host_end < 0:
+            host_end = head_end
+        host = data[host_start:host_end].strip().decode('ascii', errors='ignore')
+        port = 80
+        if ':' in host:
+            host, port_text = host.rsplit(':', 1)
+            port = int(port_text)
+    else:
+        parsed_url = urlparse(url)
+        host = parsed_url.hostname or ''
+        port = parsed_url.port or (443 if url.startswith('https') else 80)
+
+    if not host:
+        raise ValueError(f"No target host in request: {first_line!r}")
+    return ParsedRequest(method, host, port, data)
+
+def _abort_socket(sock: socket.socket) -> None:
+    """Close with an immediate RST instead of a FIN handshake, freeing the socket at once"""
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+    except OSError:
+        pass
+    sock.close()
+
+def _set_low_latency(sock: socket.socket) -> None:
+    """Disable Nagle's algorithm and, on Linux, delayed ACKs for a connected socket"""
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    if hasattr(socket, 'TCP_QUICKACK'):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+
+# Slots in NetworkInterface.counters
+(BYTES_SENT, BYTES_RECEIVED, TOTAL_REQUESTS, SUCCESSFUL_REQUESTS,
+ FAILED_REQUESTS, RESPONSE_NS, TIMED_REQUESTS) = range(7)
+
 class NetworkInterface:
-    def __init__(self, name: str, ip: str):
-        self.name = name
-        self.ip = ip
-        self.active_connections = 0
-        self.last_used = 0
-        self.bytes_sent = 0
-        self.bytes_received = 0
-        self.total_requests = 0
-        self.successful_requests = 0  # Added to track successful requests
-        self.failed_requests = 0
-        self.last_failure = None
-        self.avg_response_time = 0
-        self.status = "ACTIVE"  # ACTIVE, DEGRADED, FAILED
+    __slots__ = (
+        'name', 'ip', 'idx', 'counters', 'active_connections',
+        'last_used', 'last_failure', 'status'
+    )
+
+    def __init__(self, name: str, ip: str, idx: int = 0) -> None:
+        self.name: str = name
+        self.ip: str = ip
+        self.idx: int = idx  # Position in LoadBalancer.interfaces and its failure tables
+        # All monotonically increasing counters share one compact array, indexed by the constants above
+        self.counters: 'array.array[int]' = array.array('Q', [0] * 7)
+        self.active_connections: int = 0
+        self.last_used: int = 0
+        self.last_failure: Optional[int] = None
+        self.status: str = "ACTIVE"  # ACTIVE, DEGRADED, FAILED
         
-    def __str__(self):
+    def __str__(self) -> str:
         return f"Interface({self.name}, {self.ip}, {self.status})"
     
-    def update_stats(self, bytes_transferred: int, response_time: float):
-        self.bytes_sent += bytes_transferred
-        self.total_requests += 1
-        # Update moving average of response time
-        self.avg_response_time = (self.avg_response_time * (self.total_requests - 1) + response_time) / self.total_requests
+    @property
+    def avg_response_time(self) -> float:
+        """Average response time in seconds, derived only when read"""
+        c = self.counters
+        if c[TIMED_REQUESTS] == 0:
+            return 0.0
+        return c[RESPONSE_NS] / c[TIMED_REQUESTS] / 1e9
+
+    def update_stats(self, bytes_sent: int, bytes_received: int, response_time_ns: int) -> None:
+        # Plain integer sums; request totals are counted by mark_request_*
+        c = self.counters
+        c[BYTES_SENT] += bytes_sent
+        c[BYTES_RECEIVED] += bytes_received
+        c[RESPONSE_NS] += response_time_ns
+        c[TIMED_REQUESTS] += 1
 
     def get_success_rate(self) -> float:
         """Calculate success rate safely"""
-        total = self.successful_requests + self.failed_requests
+        c = self.counters
+        total = c[SUCCESSFUL_REQUESTS] + c[FAILED_REQUESTS]
         if total == 0:
             return 0.0
-        return (self.successful_requests / total) * 100
+        return (c[SUCCESSFUL_REQUESTS] / total) * 100
 
-    def mark_request_success(self):
+    def mark_request_success(self) -> None:
         """Mark a request as successful"""
-        self.total_requests += 1
-        self.successful_requests += 1
+        c = self.counters
+        c[TOTAL_REQUESTS] += 1
+        c[SUCCESSFUL_REQUESTS] += 1
 
-    def mark_request_failed(self):
+    def mark_request_failed(self) -> None:
         """Mark a request as failed"""
-        self.total_requests += 1
-        self.failed_requests += 1
+        c = self.counters
+        c[TOTAL_REQUESTS] += 1
+        c[FAILED_REQUESTS] += 1
 
 class LoadBalancer:
-    def __init__(self):
+    def __init__(self) -> None:
         self.interfaces: List[NetworkInterface] = []
-        self.current_interface_index = 0
-        self.failed_interfaces: Dict[str, float] = {}
-        self.failure_timeout = 5
-        self.max_consecutive_failures = 3
-        self.consecutive_failures: Dict[str, int] = {}
-        self.stats_interval = 30  # seconds
-        self.last_stats_report = 0
-
-    def discover_interfaces(self):
-        """Discover and let user select network interfaces"""
+        # Round-robin over usable interfaces, rebuilt only when interfaces are added
+        self.valid_interfaces: Tuple[NetworkInterface, ...] = ()
+        self.rotation: Iterator[NetworkInterface] = itertools.cycle(self.valid_interfaces)
+        # Failure state is kept in lists indexed by NetworkInterface.idx
+        # Times are integer nanoseconds from time.monotonic_ns()
+        self.failed_until: 'array.array[int]' = array.array('q')
+        self.failure_timeout_ns: int = 5 * 1_000_000_000
+        self.max_consecutive_failures: int = 3
+        self.consecutive_failures: List[int] = []
+        self.stats_interval_ns: int = 30 * 1_000_000_000
+        self.last_stats_report: int = 0
+
+    def add_interface(self, name: str, ip: str) -> NetworkInterface:
+        """Register an interface and give it a slot in the failure tables"""
+        interface = NetworkInterface(name, ip, len(self.interfaces))
+        self.interfaces.append(interface)
+        self.failed_until.append(0)
+        self.consecutive_failures.append(0)
+
+        # Filter out invalid IP addresses (169.254.x.x)
+        self.valid_interfaces = tuple(
+            iface for iface in self.interfaces
+            if not iface.ip.startswith('169.254.')
+        )
+        self.rotation = itertools.cycle(self.valid_interfaces)
+        return interface
+
+    def discover_interfaces(self, selected: Optional[List[str]] = None) -> None:
+        """Discover network interfaces and use `selected` (names or IPs), or let the user pick"""
         try:
             available_interfaces = []
             network_interfaces = psutil.net_if_addrs()
@@ -91,15 +235,34 @@ class LoadBalancer:
             if not available_interfaces:
                 raise RuntimeError("No network interfaces found")
             
+            if selected:
+                # Non-interactive selection by interface name or IPv4 address
+                for choice in selected:
+                    matches = [(n, a) for n, a in available_interfaces if choice in (n, a)]
+                    if not matches:
+                        raise RuntimeError(f"Unknown interface: {choice}")
+                    name, ip = matches[0]
+                    self.add_interface(name, ip)
+                    logger.info(f"Selected interface: {name} ({ip})")
+                # A single interface is used twice, as in the interactive prompt
+                if len(selected) == 1:
+                    self.add_interface(name, ip)
+                return
+
             if len(available_interfaces) == 1:
                 print("\nWARNING: Only one interface available. The proxy will work but without load balancing.")
                 # Automatically select the only available interface twice
                 name, ip = available_interfaces[0]
-                self.interfaces.append(NetworkInterface(name, ip))
-                self.interfaces.append(NetworkInterface(name, ip))
+                self.add_interface(name, ip)
+                self.add_interface(name, ip)
                 logger.info(f"Selected single interface: {name} ({ip})")
                 return
             
+            if not sys.stdin.isatty():
+                raise RuntimeError(
+                    "No terminal to prompt for interfaces on; pass --interfaces or set PROXY_INTERFACES"
+                )
+
             # Get user selection
             print("\nSelect interface(s) to use (enter numbers separated by space):")
             print("Note: You can select the same interface twice if needed")
@@ -127,7 +290,7 @@ class LoadBalancer:
                     # Add selected interfaces
                     for idx in [idx1, idx2]:
                         name, ip = available_interfaces[idx]
-                        self.interfaces.append(NetworkInterface(name, ip))
+                        self.add_interface(name, ip)
                         logger.info(f"Selected interface: {name} ({ip})")
                     break
                     
@@ -139,109 +302,364 @@ class LoadBalancer:
             logger.error(f"Error discovering interfaces: {e}")
             raise
 
-    def mark_interface_failed(self, interface: NetworkInterface, error: str):
+    def mark_interface_failed(self, interface: NetworkInterface, error: str) -> None:
         """Track interface failures with detailed reporting"""
+        idx = interface.idx
         interface.mark_request_failed()
-        interface.last_failure = time.time()
-        self.consecutive_failures[interface.ip] = self.consecutive_failures.get(interface.ip, 0) + 1
+        now = time.monotonic_ns()
+        interface.last_failure = now
+        self.consecutive_failures[idx] += 1
         
-        if self.consecutive_failures[interface.ip] >= self.max_consecutive_failures:
-            self.failed_interfaces[interface.ip] = time.time()
+        if self.consecutive_failures[idx] >= self.max_consecutive_failures:
+            self.failed_until[idx] = now + self.failure_timeout_ns
             interface.status = "FAILED"
             logger.warning(
                 f"Interface {interface.name} ({interface.ip}) marked as FAILED:\n"
-                f"  - Consecutive failures: {self.consecutive_failures[interface.ip]}\n"
+                f"  - Consecutive failures: {self.consecutive_failures[idx]}\n"
                 f"  - Last error: {error}\n"
                 f"  - Success rate: {interface.get_success_rate():.1f}%\n"
                 f"  - Average response time: {interface.avg_response_time:.2f}s\n"
                 f"Switching to backup interface..."
             )
-            self.consecutive_failures[interface.ip] = 0
+            self.consecutive_failures[idx] = 0
         else:
             interface.status = "DEGRADED"
             logger.info(
                 f"Interface {interface.name} degraded performance:\n"
-                f"  - Failure count: {self.consecutive_failures[interface.ip]}/{self.max_consecutive_failures}\n"
+                f"  - Failure count: {self.consecutive_failures[idx]}/{self.max_consecutive_failures}\n"
                 f"  - Error: {error}"
             )
 
-    def report_stats(self):
+    def report_stats(self) -> None:
         """Generate periodic interface statistics report"""
-        current_time = time.time()
-        if current_time - self.last_stats_report >= self.stats_interval:
-            logger.info("\n=== Interface Statistics Report ===")
-            for interface in self.interfaces:
-                status_color = {
-                    "ACTIVE": "✓",
-                    "DEGRADED": "⚠",
-                    "FAILED": "✗"
-                }.get(interface.status, "?")
-                
-                logger.info(
-                    f"\nInterface: {interface.name} ({interface.ip}) {status_color}\n"
-                    f"  Status: {interface.status}\n"
-                    f"  Active connections: {max(0, interface.active_connections)}\n"
-                    f"  Total requests: {interface.total_requests}\n"
-                    f"  Successful requests: {interface.successful_requests}\n"
-                    f"  Failed requests: {interface.failed_requests}\n"
-                    f"  Success rate: {interface.get_success_rate():.1f}%\n"
-                    f"  Average response time: {interface.avg_response_time:.2f}s\n"
-                    f"  Data transferred: {self.format_bytes(interface.bytes_sent)}"
-                )
-            logger.info("=" * 30)
+        current_time = time.monotonic_ns()
+        if current_time - self.last_stats_report >= self.stats_interval_ns:
+            # Emit the whole report as a single record
+            lines = [self._format_interface(interface) for interface in self.interfaces]
+            logger.info(
+                "\n=== Interface Statistics Report ===\n"
+                + "\n".join(lines) + "\n"
+                + "=" * 30
+            )
             self.last_stats_report = current_time
 
+    def _format_interface(self, interface: NetworkInterface) -> str:
+        """Format one interface's section of the statistics report"""
+        status_color = {
+            "ACTIVE": "✓",
+            "DEGRADED": "⚠",
+            "FAILED": "✗"
+        }.get(interface.status, "?")
+
+        c = interface.counters
+        return (
+            f"\nInterface: {interface.name} ({interface.ip}) {status_color}\n"
+            f"  Status: {interface.status}\n"
+            f"  Active connections: {interface.active_connections}\n"
+            f"  Total requests: {c[TOTAL_REQUESTS]}\n"
+            f"  Successful requests: {c[SUCCESSFUL_REQUESTS]}\n"
+            f"  Failed requests: {c[FAILED_REQUESTS]}\n"
+            f"  Success rate: {interface.get_success_rate():.1f}%\n"
+            f"  Average response time: {interface.avg_response_time:.2f}s\n"
+            f"  Data transferred: {self.format_bytes(c[BYTES_SENT] + c[BYTES_RECEIVED])}"
+        )
+
     @staticmethod
     def format_bytes(bytes_count: int) -> str:
         """Format bytes to human readable format"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if bytes_count < 1024:
-                return f"{bytes_count:.1f} {unit}"
-            bytes_count /= 1024
-        return f"{bytes_count:.1f} TB"
-
-    def is_interface_failed(self, interface: NetworkInterface) -> bool:
-        """Check if interface is currently marked as failed"""
-        if interface.ip in self.failed_interfaces:
-            # Check if enough time has passed to retry
-            if time.time() - self.failed_interfaces[interface.ip] > self.failure_timeout:
-                del self.failed_interfaces[interface.ip]
-                return False
-            return True
-        return False
+        index = min(max(bytes_count.bit_length() - 1, 0) // 10, len(_UNITS) - 1)
+        unit, divisor = _UNITS[index]
+        return f"{bytes_count / divisor:.1f} {unit}"
 
     def get_best_interface(self) -> NetworkInterface:
         """Quick interface selection with fast failover"""
         if not self.interfaces:
             raise RuntimeError("No interfaces available")
 
-        # Filter out invalid IP addresses (169.254.x.x)
-        valid_interfaces = [
-            interface for interface in self.interfaces 
-            if not interface.ip.startswith('169.254.')
-        ]
-
-        if not valid_interfaces:
+        if not self.valid_interfaces:
             raise RuntimeError("No valid interfaces available. Please select interfaces with valid IP addresses.")
 
         # Try interfaces in round-robin fashion
-        for _ in range(len(valid_interfaces)):
-            interface = valid_interfaces[self.current_interface_index % len(valid_interfaces)]
-            self.current_interface_index = (self.current_interface_index + 1) % len(valid_interfaces)
-            
-            if not self.is_interface_failed(interface):
+        now = time.monotonic_ns()
+        failed_until = self.failed_until
+        for _ in range(len(self.valid_interfaces)):
+            interface = next(self.rotation)
+            if failed_until[interface.idx] <= now:
                 return interface
                 
         # If all interfaces are failed, reset and try again
-        self.failed_interfaces.clear()
-        self.consecutive_failures.clear()
-        return valid_interfaces[0]
+        self.failed_until = array.array('q', [0]) * len(self.interfaces)
+        self.consecutive_failures[:] = [0] * len(self.interfaces)
+        return next(self.rotation)
+
+class DNSCache:
+    """Cache resolved upstream addresses so repeat requests skip getaddrinfo"""
+    def __init__(self, ttl: float = 60.0, max_entries: int = 1024):
+        self.ttl_ns = int(ttl * 1_000_000_000)
+        self.max_entries = max_entries
+        # (host, port) -> (addresses, expiry in time.monotonic_ns()), oldest first
+        self.entries: Dict[Tuple[str, int], Tuple[Tuple[str, ...], int]] = {}
+
+    async def resolve(self, host: str, port: int) -> Tuple[str, ...]:
+        """Return the IPv4 addresses for host, resolving only on a cache miss"""
+        key = (host, port)
+        now = time.monotonic_ns()
+        entry = self.entries.get(key)
+        if entry and entry[1] > now:
+            return entry[0]
+
+        loop = asyncio.get_running_loop()
+        # Interfaces are bound by IPv4 address, so only IPv4 targets are usable
+        infos = await loop.getaddrinfo(
+            host, port,
+            family=socket.AF_INET,
+            type=socket.SOCK_STREAM
+        )
+        # Keep every address, in resolver order, so callers can fall back to the next one
+        addresses = tuple(dict.fromkeys(str(info[4][0]) for info in infos))
+        self.entries.pop(key, None)
+        if len(self.entries) >= self.max_entries:
+            self.prune(now)
+        self.entries[key] = (addresses, now + self.ttl_ns)
+        return addresses
+
+    def prune(self, now: int) -> None:
+        """Drop expired entries, then the oldest ones while the cache is still full"""
+        for key in [key for key, (_, expires) in self.entries.items() if expires <= now]:
+            del self.entries[key]
+        while len(self.entries) >= self.max_entries:
+            del self.entries[next(iter(self.entries))]
+
+    def invalidate(self, host: str, port: int) -> None:
+        """Drop a cached address, e.g. after a failed connection attempt"""
+        self.entries.pop((host, port), None)
+
+class IdleTimer:
+    """Single timer that fires once no activity has been recorded for `timeout` seconds"""
+    def __init__(self, loop: asyncio.AbstractEventLoop, timeout: float, callback: Callable[[], None]):
+        self.loop = loop
+        self.timeout = timeout
+        self.callback = callback
+        self.expired = False
+        self.last_activity = loop.time()
+        self.handle = loop.call_at(self.last_activity + timeout, self._check)
+
+    def touch(self) -> None:
+        """Record activity; the timer itself is only rearmed when it comes due"""
+        self.last_activity = self.loop.time()
+
+    def _check(self) -> None:
+        deadline = self.last_activity + self.timeout
+        if self.loop.time() >= deadline:
+            self.expired = True
+            self.callback()
+        else:
+            self.handle = self.loop.call_at(deadline, self._check)
+
+    def cancel(self) -> None:
+        self.handle.cancel()
+
+class RelayDirection(abc.ABC):
+    """One half of a SocketRelay: bytes flowing from src to dst"""
+    def __init__(self, name: str, src: socket.socket, dst: socket.socket):
+        self.name = name
+        self.src = src
+        self.dst = dst
+        self.bytes_count = 0
+
+    @abc.abstractmethod
+    def read(self) -> int:
+        """Stage the next chunk from src; 0 means EOF"""
+
+    @abc.abstractmethod
+    def flush(self) -> bool:
+        """Write staged bytes to dst; False if dst filled up before they were all sent"""
+
+    @abc.abstractmethod
+    def release(self) -> None:
+        """Give back the staging resources"""
+
+class BufferedDirection(RelayDirection):
+    """Stages data in a pooled userspace buffer"""
+    def __init__(self, name: str, src: socket.socket, dst: socket.socket):
+        super().__init__(name, src, dst)
+        self.buffer = _buffers.popleft() if _buffers else bytearray(BUFFER_SIZE)
+        self.view = memoryview(self.buffer)
+        self.pending = self.view[:0]  # Unsent tail of the last chunk
+
+    def read(self) -> int:
+        n = self.src.recv_into(self.view)
+        self.pending = self.view[:n]
+        return n
+
+    def flush(self) -> bool:
+        while self.pending:
+            try:
+                sent = self.dst.send(self.pending)
+            except (BlockingIOError, InterruptedError):
+                return False
+            self.pending = self.pending[sent:]
+        return True
+
+    def release(self) -> None:
+        self.pending = self.view[:0]
+        _buffers.append(self.buffer)
+
+class SpliceDirection(RelayDirection):
+    """Stages data in a kernel pipe with os.splice, so payload bytes never enter userspace"""
+    def __init__(self, name: str, src: socket.socket, dst: socket.socket):
+        super().__init__(name, src, dst)
+        self.pipe_r, self.pipe_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+        self.pending = 0  # Bytes sitting in the pipe
+
+    def read(self) -> int:
+        n = os.splice(self.src.fileno(), self.pipe_w, BUFFER_SIZE, flags=_SPLICE_FLAGS)
+        self.pending = n
+        return n
+
+    def flush(self) -> bool:
+        while self.pending:
+            try:
+                sent = os.splice(self.pipe_r, self.dst.fileno(), self.pending, flags=_SPLICE_FLAGS)
+            except (BlockingIOError, InterruptedError):
+                return False
+            self.pending -= sent
+        return True
+
+    def release(self) -> None:
+        os.close(self.pipe_r)
+        os.close(self.pipe_w)
+
+# How a relay ended: the direction that stopped it (None on idle timeout) and its error, if any
+RelayResult = Tuple[Optional[RelayDirection], Optional[Exception]]
+
+def _raise_fd_limit() -> None:
+    """Lift the soft open-file limit to the hard limit; a spliced tunnel holds 6 descriptors"""
+    if sys.platform == 'win32':
+        return
+    import resource
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return
+    target = hard if hard != resource.RLIM_INFINITY else 65536
+    if sys.platform == 'darwin':
+        # macOS may report an unlimited hard limit but rejects soft limits above OPEN_MAX
+        target = min(target, _MACOS_OPEN_MAX)
+    if target <= soft:
+        return
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    except (ValueError, OSError) as e:
+        logger.warning(f"Could not raise the open file limit from {soft}: {e}")
+
+def _make_direction(name: str, src: socket.socket, dst: socket.socket) -> RelayDirection:
+    """Use zero-copy splicing where the platform supports it"""
+    if _HAS_SPLICE:
+        try:
+            return SpliceDirection(name, src, dst)
+        except OSError:
+            pass  # e.g. out of file descriptors for the pipe
+    return BufferedDirection(name, src, dst)
+
+class SocketRelay:
+    """Relay bytes both ways between two sockets from loop readiness callbacks.
+
+    Each direction reads while its source is readable and pauses reading
+    while its destination is backed up, so a slow peer on one side never
+    stalls the other. No tasks are created; `done` resolves with the
+    direction and error (if any) that ended the relay.
+    """
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        client_sock: socket.socket,
+        remote_sock: socket.socket,
+        idle_timeout: float = 10.0
+    ):
+        self.loop = loop
+        self.directions = (
+            _make_direction('client → server', client_sock, remote_sock),
+            _make_direction('server → client', remote_sock, client_sock),
+        )
+        self.done: 'asyncio.Future[RelayResult]' = loop.create_future()
+        self.idle_timer = IdleTimer(loop, idle_timeout, self._on_idle)
+        self.closed = False
+
+    @property
+    def bytes_transferred(self) -> int:
+        return sum(d.bytes_count for d in self.directions)
+
+    def start(self) -> 'asyncio.Future[RelayResult]':
+        """Begin relaying; the connection ends when either direction does"""
+        for d in self.directions:
+            self.loop.add_reader(d.src.fileno(), self._on_readable, d)
+        return self.done
+
+    def _on_readable(self, d: RelayDirection) -> None:
+        try:
+            n = d.read()
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._finish(d, e)
+            return
+        if not n:
+            self._finish(d, None)
+            return
+        d.bytes_count += n
+        try:
+            flushed = d.flush()
+        except OSError as e:
+            self._finish(d, e)
+            return
+        if flushed:
+            self.idle_timer.touch()
+            return
+        # Destination is full: stop reading until the rest has been written
+        self.loop.remove_reader(d.src.fileno())
+        self.loop.add_writer(d.dst.fileno(), self._on_writable, d)
+
+    def _on_writable(self, d: RelayDirection) -> None:
+        try:
+            flushed = d.flush()
+        except OSError as e:
+            self._finish(d, e)
+            return
+        if not flushed:
+            return
+        self.idle_timer.touch()
+        self.loop.remove_writer(d.dst.fileno())
+        self.loop.add_reader(d.src.fileno(), self._on_readable, d)
+
+    def _on_idle(self) -> None:
+        self._finish(None, TimeoutError("connection idle"))
+
+    def _finish(self, d: Optional[RelayDirection], error: Optional[Exception]) -> None:
+        self.close()
+        if not self.done.done():
+            self.done.set_result((d, error))
+
+    def close(self) -> None:
+        """Unregister from the loop and release staging buffers; must run before the sockets close"""
+        if self.closed:
+            return
+        self.closed = True
+        self.idle_timer.cancel()
+        try:
+            for d in self.directions:
+                self.loop.remove_reader(d.src.fileno())
+                self.loop.remove_writer(d.dst.fileno())
+        finally:
+            for d in self.directions:
+                d.release()
 
 class ProxyServer:
     def __init__(self, host: str = '127.0.0.1', port: int = 8080):
         self.host = host
         self.port = port
         self.load_balancer = LoadBalancer()
+        self.dns_cache = DNSCache()
+        self.client_tasks: 'Set[asyncio.Task[None]]' = set()
         # Add log directory setup
         self.log_dir = "proxy_logs"
         os.makedirs(self.log_dir, exist_ok=True)
@@ -249,30 +667,53 @@ class ProxyServer:
             self.log_dir,
             f"proxy_log_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         )
+        # Configured here rather than at import, so importing the module has no side effects
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(message)s',  # Final formatting happens in the listener's handlers
+            handlers=[logging.handlers.QueueHandler(_log_queue)]
+        )
+        self.log_listener: Optional[logging.handlers.QueueListener] = None
+        self.start_log_listener()
+        # Flush whatever is still queued when the process exits
+        atexit.register(self.stop_log_listener)
+
+    def start_log_listener(self) -> None:
+        """Write queued log records to the console and the log file from a background thread"""
+        console_handler = logging.StreamHandler()
+        file_handler = logging.FileHandler(self.log_file, encoding='utf-8')
+        for handler in (console_handler, file_handler):
+            handler.setFormatter(_log_formatter)
+
+        self.log_listener = logging.handlers.QueueListener(_log_queue, console_handler, file_handler)
+        self.log_listener.start()
+
+    def stop_log_listener(self) -> None:
+        """Drain the log queue and stop the listener thread"""
+        if self.log_listener:
+            self.log_listener.stop()
+            self.log_listener = None
         
-    async def handle_client(
-        self,
-        reader: asyncio.StreamReader,
-        writer: asyncio.StreamWriter
-    ):
+    async def handle_client(self, client_sock: socket.socket, client_addr: Tuple[str, int]) -> None:
         """Handle individual client connections with detailed monitoring"""
+        loop = asyncio.get_running_loop()
         interface = None
-        remote_writer = None
-        tasks = []
-        start_time = time.time()
-        bytes_transferred = 0
+        remote_sock = None
+        relay = None
+        # Failed connections are reset rather than closed gracefully
+        abort = False
+        start_ns = time.monotonic_ns()
         
         try:
+            _set_low_latency(client_sock)
+
             try:
                 interface = self.load_balancer.get_best_interface()
             except RuntimeError as e:
                 logger.error(f"Interface selection failed: {e}")
-                writer.write(b'HTTP/1.1 503 Service Unavailable\r\n\r\n')
-                await writer.drain()
+                await loop.sock_sendall(client_sock, _RESP_503)
                 return
 
-            client_addr = writer.get_extra_info('peername')
-            
             # Log new connection
             self.log_event(
                 "CONNECTION", 
@@ -282,250 +723,401 @@ class ProxyServer:
 
             # Read the initial request with timeout
             try:
-                request_data = await asyncio.wait_for(reader.read(8192), timeout=5.0)
-                request_text = request_data.decode('utf-8', errors='ignore')
+                request_data = await asyncio.wait_for(loop.sock_recv(client_sock, 8192), timeout=5.0)
             except asyncio.TimeoutError:
                 logger.error("Timeout reading request")
+                abort = True
                 return
             
-            # Quick parse of the request
-            first_line = request_text.split('\n')[0].strip()
-            try:
-                method, url, protocol = first_line.split(' ')
-            except ValueError:
-                logger.error(f"Invalid request format: {first_line}")
-                return
-            
-            # Fast path for CONNECT
             try:
-                if method == 'CONNECT':
-                    host, port = url.split(':')
-                    port = int(port)
-                else:
-                    # Quick host extraction
-                    host_start = request_text.find('Host: ') + 6
-                    if host_start > 5:
-                        host_end = request_text.find('\r\n', host_start)
-                        host = request_text[host_start:host_end].strip()
-                        port = 80
-                    else:
-                        parsed_url = urlparse(url)
-                        host = parsed_url.netloc
-                        port = parsed_url.port or (443 if url.startswith('https') else 80)
+                request = _parse_request(request_data)
             except Exception as e:
                 logger.error(f"Error parsing request: {e}")
+                abort = True
                 return
 
-            # Fast connection attempt with immediate failover
-            async def try_connect(interface):
-                try:
-                    return await asyncio.wait_for(
-                        asyncio.open_connection(
-                            host=host,
-                            port=port,
-                            local_addr=(interface.ip, 0)
-                        ),
-                        timeout=2.0
-                    )
-                except Exception as e:
-                    logger.error(f"Quick connection failed via {interface}: {e}")
-                    self.load_balancer.mark_interface_failed(interface, str(e))
-                    return None
-
             # Try all interfaces quickly
-            remote_reader = None
             for _ in range(len(self.load_balancer.interfaces)):
-                result = await try_connect(interface)
-                if result:
-                    remote_reader, remote_writer = result
+                remote_sock = await self.try_connect(interface, request)
+                if remote_sock:
                     break
                 interface = self.load_balancer.get_best_interface()
             
-            if not remote_writer:
-                writer.write(b'HTTP/1.1 502 Bad Gateway\r\n\r\n')
-                await writer.drain()
+            if not remote_sock:
+                await loop.sock_sendall(client_sock, _RESP_502)
                 return
+            interface.active_connections += 1
 
             # Connection successful, handle the request
+            head_sent = 0  # Request bytes forwarded before the relay took over
             try:
-                if method == 'CONNECT':
-                    writer.write(b'HTTP/1.1 200 Connection established\r\n\r\n')
+                if request.method == 'CONNECT':
+                    await loop.sock_sendall(client_sock, _RESP_200)
                 else:
-                    remote_writer.write(request_data)
-                await writer.drain()
-
-                # Create forwarding tasks
-                client_to_server = asyncio.create_task(
-                    self.forward(reader, remote_writer, 'client → server', interface),
-                    name=f"c2s_{host}:{port}"
-                )
-                server_to_client = asyncio.create_task(
-                    self.forward(remote_reader, writer, 'server → client', interface),
-                    name=f"s2c_{host}:{port}"
-                )
-                tasks.extend([client_to_server, server_to_client])
-
-                # Wait for either task to complete (or fail)
-                done, pending = await asyncio.wait(
-                    tasks,
-                    return_when=asyncio.FIRST_COMPLETED
-                )
+                    await loop.sock_sendall(remote_sock, request.raw)
+                    head_sent = len(request.raw)
 
-                # Cancel pending tasks
-                for task in pending:
-                    task.cancel()
-                    try:
-                        await task
-                    except asyncio.CancelledError:
-                        pass
+                # Relay both directions until either side finishes (or fails)
+                relay = SocketRelay(loop, client_sock, remote_sock)
+                direction, error = await relay.start()
+                self.log_relay_end(relay, direction, error, interface)
+                abort = error is not None
 
             except Exception as e:
                 logger.error(f"Error in connection handling: {e}")
+                abort = True
 
             # Update interface statistics
-            end_time = time.time()
-            response_time = end_time - start_time
-            interface.update_stats(bytes_transferred, response_time)
+            bytes_sent, bytes_received = head_sent, 0
+            if relay:
+                relayed_sent, bytes_received = (d.bytes_count for d in relay.directions)
+                bytes_sent += relayed_sent
+            interface.update_stats(bytes_sent, bytes_received, time.monotonic_ns() - start_ns)
             
             # Generate periodic statistics report
             self.load_balancer.report_stats()
 
             # Update success statistics on successful connection
-            if remote_writer:
+            if remote_sock:
                 interface.mark_request_success()
 
         except Exception as e:
             if interface:
                 self.load_balancer.mark_interface_failed(interface, str(e))
             logger.error(f"Connection error: {e}")
+            abort = True
             
         finally:
-            # Clean up tasks
-            for task in tasks:
-                if not task.done():
-                    task.cancel()
-                    try:
-                        await task
-                    except asyncio.CancelledError:
-                        pass
-                    except Exception as e:
-                        logger.error(f"Error cancelling task {task.get_name()}: {e}")
-
-            # Clean up connections
-            if interface:
-                interface.active_connections = max(0, interface.active_connections - 1)
-            
-            for w in [writer, remote_writer]:
-                if w and not w.is_closing():
-                    try:
-                        w.close()
-                        await asyncio.wait_for(w.wait_closed(), timeout=1.0)
-                    except Exception:
-                        pass
-
-    async def forward(self, reader, writer, direction, interface: NetworkInterface = None):
-        """Optimized data forwarding with monitoring"""
-        bytes_count = 0
-        try:
-            while True:
+            # Detach the relay from the loop before its sockets are closed
+            if relay:
                 try:
-                    data = await asyncio.wait_for(reader.read(32768), timeout=10.0)
-                    if not data:
-                        break
-                    bytes_count += len(data)
-                    writer.write(data)
-                    await writer.drain()
-                except asyncio.TimeoutError:
-                    # On timeout
-                    self.log_event(
-                        "TIMEOUT",
-                        f"{direction} after {self.load_balancer.format_bytes(bytes_count)}",
-                        interface,
-                        "WARNING"
-                    )
-                    break
-                except ConnectionResetError:
-                    # On connection reset
-                    self.log_event(
-                        "RESET",
-                        f"{direction} after {self.load_balancer.format_bytes(bytes_count)}",
-                        interface,
-                        "WARNING"
-                    )
-                    break
+                    relay.close()
                 except Exception as e:
-                    logger.error(
-                        f"Error forwarding {direction}: {e}\n"
-                        f"  Interface: {interface.name if interface else 'unknown'}\n"
-                        f"  Bytes transferred: {self.load_balancer.format_bytes(bytes_count)}"
-                    )
+                    logger.error(f"Error closing relay: {e}")
+                    abort = True
+
+            # Clean up connections; only connected requests were counted as active
+            if remote_sock and interface:
+                interface.active_connections -= 1
+
+            # 502/503 replies still close gracefully so the status line is delivered
+            for sock in [client_sock, remote_sock]:
+                if sock:
+                    if abort:
+                        _abort_socket(sock)
+                    else:
+                        sock.close()
+
+    async def try_connect(
+        self,
+        interface: NetworkInterface,
+        request: ParsedRequest
+    ) -> Optional[socket.socket]:
+        """Fast connection attempt through one interface, for immediate failover"""
+        try:
+            # Resolution and every connect attempt share one deadline
+            return await asyncio.wait_for(
+                self.open_upstream(interface, request),
+                timeout=2.0
+            )
+        except Exception as e:
+            self.dns_cache.invalidate(request.host, request.port)
+            logger.error(f"Quick connection failed via {interface}: {e}")
+            self.load_balancer.mark_interface_failed(interface, str(e))
+            return None
+
+    async def open_upstream(
+        self,
+        interface: NetworkInterface,
+        request: ParsedRequest
+    ) -> socket.socket:
+        """Resolve the target and dial its addresses in turn from the interface's IP"""
+        loop = asyncio.get_running_loop()
+        addresses = await self.dns_cache.resolve(request.host, request.port)
+        error: Optional[OSError] = None
+        for address in addresses:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            try:
+                sock.setblocking(False)
+                sock.bind((interface.ip, 0))
+                await loop.sock_connect(sock, (address, request.port))
+                _set_low_latency(sock)
+                return sock
+            except OSError as e:
+                sock.close()
+                error = e
+            except BaseException:
+                # Also close on cancellation by the caller's deadline
+                sock.close()
+                raise
+        raise error if error else OSError(f"No addresses for {request.host}")
+
+    def log_relay_end(
+        self,
+        relay: SocketRelay,
+        direction: Optional[RelayDirection],
+        error: Optional[Exception],
+        interface: Optional[NetworkInterface] = None
+    ) -> None:
+        """Log why a relay stopped, if it was anything other than a clean close"""
+        if error is None:
+            return
+        name = direction.name if direction else 'client ↔ server'
+        bytes_count = direction.bytes_count if direction else relay.bytes_transferred
+        if isinstance(error, TimeoutError):
+            # On timeout
+            self.log_event(
+                "TIMEOUT",
+                f"{name} after {self.load_balancer.format_bytes(bytes_count)}",
+                interface,
+                "WARNING"
+            )
+        elif isinstance(error, ConnectionResetError):
+            # On connection reset
+            self.log_event(
+                "RESET",
+                f"{name} after {self.load_balancer.format_bytes(bytes_count)}",
+                interface,
+                "WARNING"
+            )
+        else:
+            logger.error(
+                f"Error forwarding {name}: {error}\n"
+                f"  Interface: {interface.name if interface else 'unknown'}\n"
+                f"  Bytes transferred: {self.load_balancer.format_bytes(bytes_count)}"
+            )
+
+    def configure(self, prompt_port: bool = True, interfaces: Optional[List[str]] = None) -> None:
+        """Pick the port and interfaces, prompting only for what was not given up front"""
+        print("\nProxy Server Configuration")
+        print("-------------------------")
+        
+        # Let user configure port
+        while prompt_port:
+            try:
+                port_input = input("Enter port number (default 8080): ").strip()
+                if not port_input:
                     break
-            return bytes_count
-        except asyncio.CancelledError:
-            logger.debug(f"Forward {direction} cancelled after {self.load_balancer.format_bytes(bytes_count)}")
-            raise
+                port = int(port_input)
+                if 1024 <= port <= 65535:
+                    self.port = port
+                    break
+                print("Port must be between 1024 and 65535")
+            except ValueError:
+                print("Invalid port number")
+        
+        # Discover and select interfaces
+        self.load_balancer.discover_interfaces(interfaces)
 
-    async def start(self):
-        """Start the proxy server"""
+    def listen(self, reuse_port: bool = False) -> socket.socket:
+        """Bind the listening socket; with reuse_port each worker binds its own and the kernel spreads connections"""
+        # The listen address may be IPv4 or IPv6; upstream connections stay IPv4
+        family, _, _, _, address = socket.getaddrinfo(
+            self.host, self.port, type=socket.SOCK_STREAM, flags=socket.AI_PASSIVE
+        )[0]
+        server_sock = socket.socket(family, socket.SOCK_STREAM)
         try:
-            print("\nProxy Server Configuration")
-            print("-------------------------")
-            
-            # Let user configure port
+            # Allow quick restarts while old connections sit in TIME_WAIT
+            server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if reuse_port:
+                server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            server_sock.bind(address)
+            server_sock.listen(socket.SOMAXCONN)
+            server_sock.setblocking(False)
+        except OSError:
+            server_sock.close()
+            raise
+        return server_sock
+
+    def print_status(self, workers: int = 1) -> None:
+        """Show where the proxy listens and how to point a browser at it"""
+        print("\nProxy Server Status")
+        print("------------------")
+        # IPv6 literals need brackets to be written with a port
+        endpoint = f"[{self.host}]:{self.port}" if ':' in self.host else f"{self.host}:{self.port}"
+        logger.info(f"Proxy server started on {endpoint}")
+        if workers > 1:
+            logger.info(f"Worker processes: {workers}")
+        logger.info("Combined interfaces:")
+        for interface in self.load_balancer.interfaces:
+            logger.info(f"  - {interface}")
+        logger.info(f"Logging requests to: {self.log_file}")
+        print("\nTo configure Chrome:")
+        print(f"1. Go to Settings -> System -> Open proxy settings")
+        print(f"2. Set HTTP and HTTPS proxy to: {endpoint}")
+        print("\nPress Ctrl+C to stop the server")
+
+    async def serve(self, server_sock: socket.socket) -> None:
+        """Accept clients on a raw listening socket and hand each one to handle_client"""
+        loop = asyncio.get_running_loop()
+        with server_sock:
             while True:
                 try:
-                    port_input = input("Enter port number (default 8080): ").strip()
-                    if not port_input:
-                        break
-                    port = int(port_input)
-                    if 1024 <= port <= 65535:
-                        self.port = port
-                        break
-                    print("Port must be between 1024 and 65535")
-                except ValueError:
-                    print("Invalid port number")
-            
-            # Discover and select interfaces
-            self.load_balancer.discover_interfaces()
-            
-            server = await asyncio.start_server(
-                self.handle_client,
-                self.host,
-                self.port
-            )
-            
-            print("\nProxy Server Status")
-            print("------------------")
-            logger.info(f"Proxy server started on {self.host}:{self.port}")
-            logger.info("Combined interfaces:")
-            for interface in self.load_balancer.interfaces:
-                logger.info(f"  - {interface}")
-            logger.info(f"Logging requests to: {self.log_file}")
-            print("\nTo configure Chrome:")
-            print(f"1. Go to Settings -> System -> Open proxy settings")
-            print(f"2. Set HTTP and HTTPS proxy to: {self.host}:{self.port}")
-            print("\nPress Ctrl+C to stop the server")
-                
-            async with server:
-                await server.serve_forever()
-                
-        except Exception as e:
-            logger.error(f"Server error: {e}")
+                    client_sock, client_addr = await loop.sock_accept(server_sock)
+                except OSError as e:
+                    # Keep serving; back off while descriptors are exhausted so
+                    # finishing connections get a chance to free some
+                    if e.errno in _FD_EXHAUSTED:
+                        logger.error(f"Accept failed, retrying in {ACCEPT_RETRY_DELAY}s: {e}")
+                        await asyncio.sleep(ACCEPT_RETRY_DELAY)
+                    else:
+                        logger.warning(f"Accept failed: {e}")
+                    continue
+                task = asyncio.create_task(self.handle_client(client_sock, client_addr))
+                # Keep a reference so running handlers are not garbage collected
+                self.client_tasks.add(task)
+                task.add_done_callback(self.client_tasks.discard)
+
+    def run_workers(self, server_sock: socket.socket, count: int) -> None:
+        """Fork `count` workers, each with its own event loop and SO_REUSEPORT listener.
+
+        `server_sock` is bound by the parent so a busy port fails before
+        anything is forked; the first worker serves it and the others bind
+        their own sockets to the same port.
+        """
+        # Threads do not survive fork, so each process runs its own log listener
+        self.stop_log_listener()
+        sys.stdout.flush()
+        children: Set[int] = set()
+        for i in range(count):
+            pid = os.fork()
+            if pid == 0:
+                exit_code = 1
+                try:
+                    if i > 0:
+                        server_sock.close()
+                    exit_code = self.run_worker(server_sock if i == 0 else None)
+                finally:
+                    # Never unwind into the parent's code, whatever happened above
+                    os._exit(exit_code)
+            children.add(pid)
+
+        # Only the workers accept; the parent just supervises them
+        server_sock.close()
+        self.start_log_listener()
+        failed = 0
+        try:
+            while children:
+                pid, status = os.wait()
+                children.discard(pid)
+                if status != 0:
+                    logger.error(f"Worker {pid} exited abnormally (wait status {status})")
+                    failed += 1
+        except KeyboardInterrupt:
+            # Make sure workers shut down too when only the parent was interrupted
+            for pid in children:
+                try:
+                    os.kill(pid, signal.SIGINT)
+                    os.waitpid(pid, 0)
+                except (ProcessLookupError, ChildProcessError):
+                    pass
             raise
+        if failed:
+            raise RuntimeError(f"{failed} of {count} workers failed")
+
+    def run_worker(self, server_sock: Optional[socket.socket]) -> int:
+        """Serve in a forked worker until interrupted; returns the worker's exit code"""
+        self.start_log_listener()
+        try:
+            if server_sock is None:
+                server_sock = self.listen(reuse_port=True)
+            run(self.serve(server_sock))
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            logger.error(f"Worker {os.getpid()} failed: {e}")
+            return 1
+        finally:
+            # A follow-up SIGINT from the parent must not cut the log drain short
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            self.stop_log_listener()
+        return 0
 
-    def log_event(self, event_type: str, details: str, interface=None, status="INFO"):
+    def log_event(
+        self,
+        event_type: str,
+        details: str,
+        interface: Optional[NetworkInterface] = None,
+        status: str = "INFO"
+    ) -> None:
         """Log events in a consistent one-line format"""
         interface_info = f"[{interface.name}:{interface.ip}]" if interface else "[no-interface]"
         logger.info(f"{status} | {event_type} | {interface_info} | {details}")
 
-async def main():
-    proxy = ProxyServer()
-    await proxy.start()
+def _port(value: str) -> int:
+    port = int(value)
+    if not 1024 <= port <= 65535:
+        raise argparse.ArgumentTypeError("port must be between 1024 and 65535")
+    return port
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Command line options, falling back to PROXY_* environment variables"""
+    env = os.environ
+    parser = argparse.ArgumentParser(description="Load-balancing HTTP/HTTPS proxy")
+    parser.add_argument(
+        '--host', default=env.get('PROXY_HOST', '127.0.0.1'),
+        help="IPv4 or IPv6 address to listen on (env PROXY_HOST, default 127.0.0.1)"
+    )
+    parser.add_argument(
+        '--port', type=_port, default=env.get('PROXY_PORT'),
+        help="port to listen on (env PROXY_PORT); prompted for when omitted on a terminal"
+    )
+    parser.add_argument(
+        '--interfaces', nargs='+', metavar='NAME_OR_IP',
+        default=env['PROXY_INTERFACES'].split() if env.get('PROXY_INTERFACES') else None,
+        help="interfaces to balance across (env PROXY_INTERFACES, space separated); prompted for when omitted"
+    )
+    parser.add_argument(
+        '--workers', type=int, default=env.get('PROXY_WORKERS', '1'),
+        help="worker processes sharing the port via SO_REUSEPORT, 0 for one per CPU (env PROXY_WORKERS, default 1)"
+    )
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    _raise_fd_limit()
+    proxy = ProxyServer(args.host, args.port or 8080)
+    proxy.configure(
+        prompt_port=args.port is None and sys.stdin.isatty(),
+        interfaces=args.interfaces
+    )
+
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    if workers > 1 and not (hasattr(os, 'fork') and hasattr(socket, 'SO_REUSEPORT')):
+        logger.warning("Multiple workers need os.fork and SO_REUSEPORT; running a single worker")
+        workers = 1
+
+    if workers == 1:
+        server_sock = proxy.listen()
+        proxy.print_status()
+        run(proxy.serve(server_sock))
+    else:
+        # Bind before announcing anything, so a busy port is reported up front.
+        # The plain bind also fails if another instance's workers share the port.
+        proxy.listen().close()
+        server_sock = proxy.listen(reuse_port=True)
+        proxy.print_status(workers)
+        proxy.run_workers(server_sock, workers)
+
+def run(coro: Coroutine[Any, Any, T]) -> T:
+    """Run the proxy on uvloop when it is installed, otherwise on the default loop"""
+    if sys.platform == 'win32':
+        # SocketRelay needs add_reader/add_writer, which the default proactor loop lacks
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        return asyncio.run(coro)
+    if uvloop is None:
+        return asyncio.run(coro)
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            return runner.run(coro)
+    uvloop.install()
+    return asyncio.run(coro)
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        main()
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
         logger.error(f"Fatal error: {e}")
+        sys.exit(1)
@@ -0,0 +1,270 @@
+import asyncio
+import os
+import socket
+import struct
+
+import pytest
+
+import proxy_server
+from proxy_server import (
+    BufferedDirection, DNSCache, IdleTimer, LoadBalancer, ParsedRequest,
+    SocketRelay, SpliceDirection, _parse_request
+)
+
+
+def test_connect():
+    data = b'CONNECT example.com:443 HTTP/1.1\r\nHost: example.com:443\r\n\r\n'
+    assert _parse_request(data) == ParsedRequest('CONNECT', 'example.com', 443, data)
+
+
+def test_host_header_default_port():
+    data = b'GET /index.html HTTP/1.1\r\nHost: example.com\r\nAccept: */*\r\n\r\n'
+    assert _parse_request(data) == ParsedRequest('GET', 'example.com', 80, data)
+
+
+def test_host_header_with_port():
+    request = _parse_request(b'GET / HTTP/1.1\r\nHost: example.com:8080\r\n\r\n')
+    assert (request.host, request.port) == ('example.com', 8080)
+
+
+def test_host_header_is_case_insensitive():
+    request = _parse_request(b'GET / HTTP/1.1\r\nhost: a.com\r\n\r\n')
+    assert (request.host, request.port) == ('a.com', 80)
+
+    request = _parse_request(b'GET / HTTP/1.1\r\nHOST: a.com:81\r\n\r\n')
+    assert (request.host, request.port) == ('a.com', 81)
+
+
+def test_absolute_url_fallback():
+    request = _parse_request(b'GET http://example.com:8000/path HTTP/1.1\r\nAccept: */*\r\n\r\n')
+    assert (request.host, request.port) == ('example.com', 8000)
+
+    request = _parse_request(b'GET https://example.com/ HTTP/1.1\r\n\r\n')
+    assert (request.host, request.port) == ('example.com', 443)
+
+
+def test_x_host_header_does_not_match():
+    request = _parse_request(
+        b'GET http://example.com/ HTTP/1.1\r\nX-Host: other.com\r\n\r\n'
+    )
+    assert request.host == 'example.com'
+
+
+def test_host_in_body_is_ignored():
+    with pytest.raises(ValueError):
+        _parse_request(b'POST /submit HTTP/1.1\r\nContent-Length: 15\r\n\r\n\r\nHost: evil.com')
+
+
+def test_host_in_body_is_ignored_without_headers():
+    request = _parse_request(b'POST http://a.com/ HTTP/1.1\r\n\r\nx=1\nhost: evil.com\r\n')
+    assert request.host == 'a.com'
+
+
+def test_invalid_request_line():
+    with pytest.raises(ValueError):
+        _parse_request(b'garbage\r\n\r\n')
+
+
+def test_dns_cache_prune_drops_expired_entries_first():
+    cache = DNSCache(max_entries=3)
+    cache.entries = {
+        ('a.com', 80): (('1.1.1.1',), 100),
+        ('b.com', 80): (('2.2.2.2',), 10),
+        ('c.com', 80): (('3.3.3.3',), 100),
+    }
+    cache.prune(50)
+    assert list(cache.entries) == [('a.com', 80), ('c.com', 80)]
+
+
+def test_dns_cache_prune_then_evicts_oldest():
+    cache = DNSCache(max_entries=2)
+    cache.entries = {
+        ('a.com', 80): (('1.1.1.1',), 100),
+        ('b.com', 80): (('2.2.2.2',), 100),
+        ('c.com', 80): (('3.3.3.3',), 100),
+    }
+    cache.prune(50)
+    # Room is made for the entry about to be inserted
+    assert list(cache.entries) == [('c.com', 80)]
+
+
+def _format_bytes_loop(bytes_count):
+    # The original per-unit loop that LoadBalancer.format_bytes replaced
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if bytes_count < 1024:
+            return f"{bytes_count:.1f} {unit}"
+        bytes_count /= 1024
+    return f"{bytes_count:.1f} TB"
+
+
+@pytest.mark.parametrize('count, expected', [
+    (0, '0.0 B'),
+    (1023, '1023.0 B'),
+    (1024, '1.0 KB'),
+    (1536, '1.5 KB'),
+    (2**20 - 1, '1024.0 KB'),
+    (2**30, '1.0 GB'),
+    (2**40, '1.0 TB'),
+    (2**50, '1024.0 TB'),
+])
+def test_format_bytes(count, expected):
+    assert LoadBalancer.format_bytes(count) == expected
+    assert LoadBalancer.format_bytes(count) == _format_bytes_loop(count)
+
+
+def _balancer(count):
+    lb = LoadBalancer()
+    for i in range(count):
+        lb.add_interface(f'eth{i}', f'10.0.0.{i + 1}')
+    return lb
+
+
+def test_get_best_interface_round_robin():
+    lb = _balancer(3)
+    picked = [lb.get_best_interface().name for _ in range(6)]
+    assert picked == ['eth0', 'eth1', 'eth2', 'eth0', 'eth1', 'eth2']
+
+
+def test_get_best_interface_skips_failed_and_link_local():
+    lb = _balancer(3)
+    lb.add_interface('wlan0', '169.254.1.1')
+    lb.failed_until[1] = 2**62
+    picked = [lb.get_best_interface().name for _ in range(4)]
+    assert picked == ['eth0', 'eth2', 'eth0', 'eth2']
+
+
+def test_get_best_interface_resets_when_all_failed():
+    lb = _balancer(2)
+    lb.failed_until[0] = lb.failed_until[1] = 2**62
+    lb.consecutive_failures[:] = [2, 2]
+    assert lb.get_best_interface().name in ('eth0', 'eth1')
+    assert list(lb.failed_until) == [0, 0]
+    assert lb.consecutive_failures == [0, 0]
+
+
+@pytest.fixture(params=[
+    pytest.param(True, id='splice', marks=pytest.mark.skipif(
+        not hasattr(os, 'splice'), reason='os.splice is Linux-only')),
+    pytest.param(False, id='buffered'),
+])
+def direction_type(request, monkeypatch):
+    """Run a relay test once with spliced and once with buffered directions"""
+    monkeypatch.setattr(proxy_server, '_HAS_SPLICE', request.param)
+    return SpliceDirection if request.param else BufferedDirection
+
+
+def _tcp_pair():
+    """A connected pair of non-blocking loopback TCP sockets"""
+    with socket.create_server(('127.0.0.1', 0)) as server:
+        a = socket.create_connection(server.getsockname())
+        b, _ = server.accept()
+    for sock in (a, b):
+        sock.setblocking(False)
+    return a, b
+
+
+async def _recv_exactly(sock, size):
+    loop = asyncio.get_running_loop()
+    data = bytearray()
+    while len(data) < size:
+        chunk = await loop.sock_recv(sock, size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return bytes(data)
+
+
+def _run_relay(scenario, idle_timeout=5.0):
+    """Relay between two loopback connections; scenario drives the outer ends"""
+    async def main():
+        loop = asyncio.get_running_loop()
+        client, client_side = _tcp_pair()
+        remote_side, remote = _tcp_pair()
+        relay = SocketRelay(loop, client_side, remote_side, idle_timeout)
+        try:
+            done = relay.start()
+            result = await scenario(loop, client, remote)
+            direction, error = await asyncio.wait_for(done, 5)
+            return relay, direction, error, result
+        finally:
+            relay.close()
+            for sock in (client, client_side, remote_side, remote):
+                sock.close()
+    return asyncio.run(main())
+
+
+def test_relay_both_directions_until_eof(direction_type):
+    async def scenario(loop, client, remote):
+        await loop.sock_sendall(client, b'ping' * 1000)
+        assert await _recv_exactly(remote, 4000) == b'ping' * 1000
+        await loop.sock_sendall(remote, b'pong' * 10)
+        assert await _recv_exactly(client, 40) == b'pong' * 10
+        client.shutdown(socket.SHUT_WR)
+
+    relay, direction, error, _ = _run_relay(scenario)
+    assert error is None
+    assert all(type(d) is direction_type for d in relay.directions)
+    assert direction is relay.directions[0]
+    assert [d.bytes_count for d in relay.directions] == [4000, 40]
+    assert relay.bytes_transferred == 4040
+
+
+def test_relay_backpressure_keeps_all_bytes(direction_type):
+    payload = os.urandom(8 * 1024 * 1024)
+
+    async def scenario(loop, client, remote):
+        async def slow_reader():
+            await asyncio.sleep(0.2)  # Let the relay's destination fill up first
+            return await _recv_exactly(remote, len(payload))
+        reader = asyncio.ensure_future(slow_reader())
+        await loop.sock_sendall(client, payload)
+        received = await reader
+        client.shutdown(socket.SHUT_WR)
+        return received
+
+    relay, _, error, received = _run_relay(scenario)
+    assert error is None
+    assert received == payload
+    assert relay.directions[0].bytes_count == len(payload)
+
+
+def test_relay_reports_reset(direction_type):
+    async def scenario(loop, client, remote):
+        await loop.sock_sendall(client, b'x')
+        await _recv_exactly(remote, 1)
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        client.close()
+
+    relay, direction, error, _ = _run_relay(scenario)
+    assert isinstance(error, ConnectionResetError)
+    assert direction is relay.directions[0]
+
+
+def test_relay_idle_timeout(direction_type):
+    async def scenario(loop, client, remote):
+        pass  # No traffic at all
+
+    relay, direction, error, _ = _run_relay(scenario, idle_timeout=0.1)
+    assert direction is None
+    assert isinstance(error, TimeoutError)
+    assert relay.closed
+
+
+def test_idle_timer_rearms_on_activity():
+    async def main():
+        loop = asyncio.get_running_loop()
+        fired = []
+        timer = IdleTimer(loop, 0.1, lambda: fired.append(loop.time()))
+        start = loop.time()
+        for _ in range(3):
+            await asyncio.sleep(0.05)
+            timer.touch()
+        await asyncio.sleep(0.2)
+        timer.cancel()
+        return start, fired, timer.expired
+
+    start, fired, expired = asyncio.run(main())
+    assert expired
+    assert len(fired) == 1
+    # The deadline moved with the last touch at ~0.15s
+    assert fired[0] - start >= 0.25